@@ -1,9 +1,71 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, abort, g
+from functools import lru_cache
+import json
+import os
+import threading
 import uuid
 import math
 
 app = Flask(__name__)
 
+# Request limits (overridable via environment for production deployments).
+# API_MAX_BYTES applies to the JSON APIs; 100 scenarios fit well within 64 KB.
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('WATTSWISE_MAX_CONTENT_LENGTH', 1024 * 1024))
+API_MAX_BYTES = int(os.environ.get('WATTSWISE_API_MAX_BYTES', 64 * 1024))
+MAX_INFLIGHT = int(os.environ.get('WATTSWISE_MAX_INFLIGHT', 16))
+QUEUE_TIMEOUT = float(os.environ.get('WATTSWISE_QUEUE_TIMEOUT', 0.5))
+RETRY_AFTER_SECONDS = 1
+MAX_SCENARIOS = int(os.environ.get('WATTSWISE_MAX_SCENARIOS', 100))
+SOLAR_KWH_PER_KW_DAY = 4.5
+
+# Backpressure: at most MAX_INFLIGHT requests are processed at once; others
+# wait up to QUEUE_TIMEOUT seconds for a slot before being rejected with 429.
+_inflight = threading.BoundedSemaphore(MAX_INFLIGHT)
+
+@app.before_request
+def acquire_slot():
+    if request.endpoint == 'static':
+        return None
+    if not _inflight.acquire(timeout=QUEUE_TIMEOUT):
+        response = jsonify({'error': 'Server busy, please retry shortly.'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response
+    g.holds_slot = True
+    return None
+
+@app.teardown_request
+def release_slot(exc):
+    if g.pop('holds_slot', False):
+        _inflight.release()
+
+@app.errorhandler(400)
+def bad_request(error):
+    return jsonify({'error': 'Malformed request body.'}), 400
+
+@app.errorhandler(413)
+def payload_too_large(error):
+    return jsonify({'error': 'Request body too large.'}), 413
+
+@app.errorhandler(415)
+def unsupported_media_type(error):
+    return jsonify({'error': 'Expected a JSON request body.'}), 415
+
+# Read a JSON body of at most max_bytes. The stream is read with a bound so the
+# limit also holds for chunked requests that carry no Content-Length.
+def read_json_body(max_bytes):
+    if request.content_length is not None and request.content_length > max_bytes:
+        abort(413)
+    if not request.is_json:
+        abort(415)
+    body = request.stream.read(max_bytes + 1)
+    if len(body) > max_bytes:
+        abort(413)
+    try:
+        return json.loads(body)
+    except ValueError:
+        abort(400)
+
 # Appliance wattage defaults (from calcy.py)
 DEFAULT_APPLIANCES = {
     "Air Conditioner": 1500,
@@ -92,6 +154,30 @@ def get_energy_tips(app):
         tips.append(f"Consider replacing {app['name']} with a more efficient model.")
     return tips
 
+@lru_cache(maxsize=1024)
+def _cached_tips(name, watt, hours):
+    return tuple(get_energy_tips({"name": name, "watt": watt, "hours": hours}))
+
+# Per-appliance result shared by the calculator, /api/calculate and /api/scenarios
+def appliance_result(name, watt, hours, monthly_units):
+    monthly_kwh = (watt * hours * 30) / 1000
+    tips = list(_cached_tips(name, watt, hours)) if name is not None else []
+    percent = (monthly_kwh / monthly_units * 100) if monthly_units else 0
+    return {"name": name, "watt": watt, "hours": hours, "monthly_kwh": round(monthly_kwh,1), "tips": tips, "percent": round(percent,1)}
+
+def summarize_results(appliances, monthly_units, price_per_unit):
+    total_appliance_kwh = sum(app["monthly_kwh"] for app in appliances)
+    saving_kwh = total_appliance_kwh * 0.10
+    saving_money = saving_kwh * price_per_unit
+    return {
+        "monthly_units": round(monthly_units,1),
+        "appliances": appliances,
+        "saving_kwh": round(saving_kwh,1),
+        "saving_money": round(saving_money,2),
+        "annual_saving_kwh": round(saving_kwh*12,1),
+        "annual_saving_money": round(saving_money*12,2)
+    }
+
 # Calculator route
 @app.route('/calculator', methods=['GET', 'POST'])
 def calculator():
@@ -106,23 +192,8 @@ def calculator():
         appliances = []
         for n, w, h in zip(names, watts, hours):
             if n and w and h:
-                w = float(w)
-                h = float(h)
-                monthly_kwh = (w * h * 30) / 1000
-                tips = get_energy_tips({"name": n, "watt": w, "hours": h})
-                percent = (monthly_kwh / monthly_units * 100) if monthly_units else 0
-                appliances.append({"name": n, "watt": w, "hours": h, "monthly_kwh": round(monthly_kwh,1), "tips": tips, "percent": round(percent,1)})
-        total_appliance_kwh = sum(app["monthly_kwh"] for app in appliances)
-        saving_kwh = total_appliance_kwh * 0.10
-        saving_money = saving_kwh * price_per_unit
-        results = {
-            "monthly_units": round(monthly_units,1),
-            "appliances": appliances,
-            "saving_kwh": round(saving_kwh,1),
-            "saving_money": round(saving_money,2),
-            "annual_saving_kwh": round(saving_kwh*12,1),
-            "annual_saving_money": round(saving_money*12,2)
-        }
+                appliances.append(appliance_result(n, float(w), float(h), monthly_units))
+        results = summarize_results(appliances, monthly_units, price_per_unit)
     return render_template('calculator.html', results=results)
 
 # Graphs route
@@ -152,7 +223,7 @@ def graphs():
     system_size_kw = round(surface_area/9,2)
     installation_cost = int(system_size_kw*50000)
     maintenance_cost_per_year = int(system_size_kw*2000)
-    daily_solar_gen = system_size_kw*4.5
+    daily_solar_gen = system_size_kw*SOLAR_KWH_PER_KW_DAY
     monthly_solar_gen = daily_solar_gen*30
     yearly_solar_gen = daily_solar_gen*365
     yearly_solar_savings = int(yearly_solar_gen*price_per_unit)
@@ -183,33 +254,147 @@ def graphs():
 # API endpoint for calculator
 @app.route('/api/calculate', methods=['POST'])
 def api_calculate():
-    data = request.json
+    data = read_json_body(API_MAX_BYTES)
     bill_amount = float(data.get('bill_amount', 0))
     price_per_unit = float(data.get('price_per_unit', 0))
     appliances = data.get('appliances', [])
     monthly_units = bill_amount / price_per_unit if price_per_unit else 0
-    result_appliances = []
-    for app in appliances:
-        n = app.get('name')
-        w = float(app.get('watt', 0))
-        h = float(app.get('hours', 0))
-        monthly_kwh = (w * h * 30) / 1000
-        tips = get_energy_tips({"name": n, "watt": w, "hours": h})
-        percent = (monthly_kwh / monthly_units * 100) if monthly_units else 0
-        result_appliances.append({"name": n, "watt": w, "hours": h, "monthly_kwh": round(monthly_kwh,1), "tips": tips, "percent": round(percent,1)})
-    total_appliance_kwh = sum(app["monthly_kwh"] for app in result_appliances)
-    saving_kwh = total_appliance_kwh * 0.10
-    saving_money = saving_kwh * price_per_unit
-    results = {
-        "monthly_units": round(monthly_units,1),
-        "appliances": result_appliances,
-        "saving_kwh": round(saving_kwh,1),
-        "saving_money": round(saving_money,2),
-        "annual_saving_kwh": round(saving_kwh*12,1),
-        "annual_saving_money": round(saving_money*12,2)
-    }
+    result_appliances = [
+        appliance_result(app.get('name'), float(app.get('watt', 0)), float(app.get('hours', 0)), monthly_units)
+        for app in appliances
+    ]
+    results = summarize_results(result_appliances, monthly_units, price_per_unit)
     return jsonify(results)
 
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def _is_name(value):
+    return isinstance(value, str) and value != ""
+
+# Check the base household sent to /api/scenarios.
+# Returns an error message, or None if the household is valid.
+def validate_household(data):
+    if not isinstance(data, dict):
+        return "Request body must be an object."
+    if any(key in data and not _is_number(data[key]) for key in ('bill_amount', 'price_per_unit')):
+        return "'bill_amount' and 'price_per_unit' must be numbers."
+    appliances = data.get('appliances', [])
+    if not isinstance(appliances, list) or not all(isinstance(a, dict) for a in appliances):
+        return "'appliances' must be a list of appliance objects."
+    for app in appliances:
+        if not isinstance(app.get('name'), str):
+            return "Each appliance needs a 'name'."
+        if any(key in app and not _is_number(app[key]) for key in ('watt', 'hours')):
+            return "'watt' and 'hours' must be numbers."
+    return None
+
+# Check the shape of one scenario diff against the base appliance names.
+# Returns an error message, or None if the scenario is valid.
+def validate_scenario(scenario, base_names):
+    if not isinstance(scenario, dict):
+        return "Each scenario must be an object."
+    remove = scenario.get('remove', [])
+    if not isinstance(remove, list) or not all(isinstance(name, str) for name in remove):
+        return "'remove' must be a list of appliance names."
+    update = scenario.get('update', [])
+    if not isinstance(update, list) or not all(isinstance(u, dict) and _is_name(u.get('name')) for u in update):
+        return "'update' must be a list of objects with a 'name'."
+    add = scenario.get('add', [])
+    if not isinstance(add, list) or not all(isinstance(a, dict) and _is_name(a.get('name')) for a in add):
+        return "'add' must be a list of appliance objects with a 'name'."
+    for entry in update + add:
+        if any(key in entry and not _is_number(entry[key]) for key in ('watt', 'hours')):
+            return "'watt' and 'hours' must be numbers."
+    unknown = [name for name in remove + [u['name'] for u in update] if name.lower() not in base_names]
+    if unknown:
+        return f"Unknown appliance(s): {', '.join(unknown)}."
+    solar_kw = scenario.get('solar_kw', 0)
+    if not _is_number(solar_kw) or solar_kw < 0:
+        return "'solar_kw' must be a non-negative number."
+    return None
+
+# Apply one scenario diff to the base appliance results. Unchanged appliances
+# are reused as-is; only updated or added ones are recomputed.
+def apply_scenario(base_appliances, scenario, monthly_units):
+    removed_names = {name.lower() for name in scenario.get('remove', [])}
+    updates = {u['name'].lower(): u for u in scenario.get('update', [])}
+    result = []
+    changed = []
+    removed = []
+    for app in base_appliances:
+        key = app["name"].lower() if app["name"] else app["name"]
+        if key in removed_names:
+            removed.append(app["name"])
+            continue
+        update = updates.get(key)
+        if update:
+            app = appliance_result(
+                app["name"],
+                float(update.get('watt', app["watt"])),
+                float(update.get('hours', app["hours"])),
+                monthly_units,
+            )
+            changed.append(app)
+        result.append(app)
+    for new in scenario.get('add', []):
+        app = appliance_result(new.get('name'), float(new.get('watt', 0)), float(new.get('hours', 0)), monthly_units)
+        changed.append(app)
+        result.append(app)
+    return result, changed, removed
+
+# API endpoint for side-by-side scenario comparison
+@app.route('/api/scenarios', methods=['POST'])
+def api_scenarios():
+    data = read_json_body(API_MAX_BYTES)
+    error = validate_household(data)
+    if error:
+        return jsonify({'error': error}), 400
+    scenarios = data.get('scenarios', [])
+    if not isinstance(scenarios, list):
+        return jsonify({'error': "'scenarios' must be a list."}), 400
+    if len(scenarios) > MAX_SCENARIOS:
+        return jsonify({'error': f'At most {MAX_SCENARIOS} scenarios per request.'}), 400
+    bill_amount = float(data.get('bill_amount', 0))
+    price_per_unit = float(data.get('price_per_unit', 0))
+    monthly_units = bill_amount / price_per_unit if price_per_unit else 0
+    base_appliances = [
+        appliance_result(app.get('name'), float(app.get('watt', 0)), float(app.get('hours', 0)), monthly_units)
+        for app in data.get('appliances', [])
+    ]
+    base_names = {app["name"].lower() for app in base_appliances if isinstance(app["name"], str)}
+    for i, scenario in enumerate(scenarios):
+        error = validate_scenario(scenario, base_names)
+        if error:
+            return jsonify({'error': f'Scenario {i + 1}: {error}'}), 400
+    base = summarize_results(base_appliances, monthly_units, price_per_unit)
+    base_appliance_kwh = sum(app["monthly_kwh"] for app in base_appliances)
+    comparison = []
+    for i, scenario in enumerate(scenarios):
+        scenario_appliances, changed, removed = apply_scenario(base_appliances, scenario, monthly_units)
+        appliance_kwh = sum(app["monthly_kwh"] for app in scenario_appliances)
+        solar_kw = float(scenario.get('solar_kw', 0))
+        solar_kwh = solar_kw * SOLAR_KWH_PER_KW_DAY * 30
+        grid_units = max(monthly_units - (base_appliance_kwh - appliance_kwh) - solar_kwh, 0.0)
+        kwh_saved = monthly_units - grid_units
+        money_saved = kwh_saved * price_per_unit
+        comparison.append({
+            "name": scenario.get('name', f"Scenario {i + 1}"),
+            "appliance_kwh": round(appliance_kwh,1),
+            "solar_kwh": round(solar_kwh,1),
+            "grid_units": round(grid_units,1),
+            "monthly_bill": round(grid_units*price_per_unit,2),
+            "kwh_saved": round(kwh_saved,1),
+            "money_saved": round(money_saved,2),
+            "annual_money_saved": round(money_saved*12,2),
+            "changed_appliances": changed,
+            "removed_appliances": removed
+        })
+    return jsonify({
+        "base": dict(base, monthly_bill=round(bill_amount,2)),
+        "scenarios": comparison
+    })
+
 # API endpoint for graphs data
 @app.route('/api/graphs-data', methods=['GET'])
 def api_graphs_data():
@@ -236,7 +421,7 @@ def api_graphs_data():
     system_size_kw = round(surface_area/9,2)
     installation_cost = int(system_size_kw*50000)
     maintenance_cost_per_year = int(system_size_kw*2000)
-    daily_solar_gen = system_size_kw*4.5
+    daily_solar_gen = system_size_kw*SOLAR_KWH_PER_KW_DAY
     monthly_solar_gen = daily_solar_gen*30
     yearly_solar_gen = daily_solar_gen*365
     yearly_solar_savings = int(yearly_solar_gen*price_per_unit)
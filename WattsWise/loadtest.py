@@ -0,0 +1,137 @@
+"""Simple load test for the /api/calculate endpoint.
+
+Usage:
+    python loadtest.py [--url http://127.0.0.1:8000] [--requests 500] [--concurrency 1 8 32 64]
+
+For each concurrency level it reports requests/sec, p50/p99 latency and how
+many requests were rejected with 429 (backpressure) or failed.
+
+To see backpressure, let the script start its own server (serve.py) with a
+small in-flight limit and heavier requests, for example:
+
+    python loadtest.py --spawn --max-inflight 1 --queue-timeout 0 --appliances 300
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_APPLIANCES = [
+    {"name": "Air Conditioner", "watt": 1500, "hours": 6},
+    {"name": "Geyser", "watt": 2000, "hours": 1},
+    {"name": "Refrigerator", "watt": 150, "hours": 24},
+    {"name": "Ceiling Fan", "watt": 75, "hours": 12},
+    {"name": "LED Bulb", "watt": 10, "hours": 6}
+]
+
+
+def build_payload(appliance_count):
+    appliances = [dict(BASE_APPLIANCES[i % len(BASE_APPLIANCES)], hours=1 + i % 12) for i in range(appliance_count)]
+    return json.dumps({"bill_amount": 3000, "price_per_unit": 8, "appliances": appliances}).encode()
+
+
+PAYLOAD = build_payload(len(BASE_APPLIANCES))
+
+
+def send(url):
+    req = urllib.request.Request(url, data=PAYLOAD, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return status, time.perf_counter() - start
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def start_server(port, threads, max_inflight, queue_timeout):
+    env = dict(
+        os.environ,
+        WATTSWISE_HOST="127.0.0.1",
+        WATTSWISE_PORT=str(port),
+        WATTSWISE_THREADS=str(threads),
+        WATTSWISE_MAX_INFLIGHT=str(max_inflight),
+        WATTSWISE_QUEUE_TIMEOUT=str(queue_timeout),
+    )
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serve.py")
+    server = subprocess.Popen([sys.executable, script], env=env, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url + "/calculator", timeout=1).read()
+            return server, url
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("serve.py did not start")
+
+
+def run_level(url, total, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: send(url), range(total)))
+    elapsed = time.perf_counter() - start
+    ok = [lat for status, lat in results if status == 200]
+    rejected = sum(1 for status, _ in results if status == 429)
+    failed = len(results) - len(ok) - rejected
+    return {
+        "concurrency": concurrency,
+        "rps": len(ok) / elapsed if elapsed else 0,
+        "p50_ms": percentile(ok, 50) * 1000,
+        "p99_ms": percentile(ok, 99) * 1000,
+        "rejected": rejected,
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--appliances", type=int, default=len(BASE_APPLIANCES),
+                        help="appliances per request; more makes each request slower")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start serve.py with the limits below instead of using --url")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--max-inflight", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+    global PAYLOAD
+    PAYLOAD = build_payload(args.appliances)
+    server = None
+    base_url = args.url
+    if args.spawn:
+        server, base_url = start_server(args.port, args.threads, args.max_inflight, args.queue_timeout)
+    url = base_url.rstrip("/") + "/api/calculate"
+    try:
+        print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'429':>5} {'err':>5}")
+        for concurrency in args.concurrency:
+            r = run_level(url, args.requests, concurrency)
+            print(f"{r['concurrency']:>5} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['rejected']:>5} {r['failed']:>5}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
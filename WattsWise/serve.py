@@ -0,0 +1,54 @@
+"""Production entry point for WattsWise.
+
+Runs the Flask app under the waitress WSGI server instead of the debug server.
+Configuration is read from the environment:
+
+    WATTSWISE_HOST            bind address (default 0.0.0.0)
+    WATTSWISE_PORT            port (default 8000)
+    WATTSWISE_THREADS         worker threads (default 32)
+    WATTSWISE_CONNECTION_LIMIT max open connections (default 256)
+    WATTSWISE_BACKLOG         listen socket backlog (default 1024)
+    WATTSWISE_MAX_INFLIGHT    requests processed concurrently (see app.py)
+    WATTSWISE_QUEUE_TIMEOUT   seconds a request waits for a slot before 429
+
+Threads beyond WATTSWISE_MAX_INFLIGHT act as the bounded waiting queue, so
+keep WATTSWISE_THREADS larger than WATTSWISE_MAX_INFLIGHT. Requests beyond
+WATTSWISE_THREADS wait in waitress's own task queue, which the app cannot see;
+that outer queue is bounded only by WATTSWISE_CONNECTION_LIMIT.
+
+SIGTERM and SIGINT stop accepting connections and give running requests a
+few seconds to finish before exiting.
+"""
+import os
+import signal
+import sys
+
+from waitress import create_server
+
+from app import app
+
+
+def _graceful_exit(signum, frame):
+    # waitress catches SystemExit in run() and shuts down its task dispatcher
+    sys.exit(0)
+
+
+def main():
+    server = create_server(
+        app,
+        host=os.environ.get('WATTSWISE_HOST', '0.0.0.0'),
+        port=int(os.environ.get('WATTSWISE_PORT', 8000)),
+        threads=int(os.environ.get('WATTSWISE_THREADS', 32)),
+        connection_limit=int(os.environ.get('WATTSWISE_CONNECTION_LIMIT', 256)),
+        backlog=int(os.environ.get('WATTSWISE_BACKLOG', 1024)),
+        channel_timeout=30,
+        ident='WattsWise',
+    )
+    signal.signal(signal.SIGTERM, _graceful_exit)
+    signal.signal(signal.SIGINT, _graceful_exit)
+    print(f"Serving WattsWise on http://{server.effective_host}:{server.effective_port}")
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
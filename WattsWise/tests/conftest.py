@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as wattswise
+
+
+@pytest.fixture
+def client():
+    wattswise.app.config['TESTING'] = True
+    return wattswise.app.test_client()
@@ -0,0 +1,186 @@
+import io
+import threading
+
+import app as wattswise
+
+HOUSEHOLD = {
+    "bill_amount": 3000,
+    "price_per_unit": 8,
+    "appliances": [
+        {"name": "Air Conditioner", "watt": 1500, "hours": 6},
+        {"name": "Ceiling Fan", "watt": 75, "hours": 12},
+        {"name": "Geyser", "watt": 2000, "hours": 1}
+    ]
+}
+
+
+def _slot_is_free():
+    if wattswise._inflight.acquire(blocking=False):
+        wattswise._inflight.release()
+        return True
+    return False
+
+
+def test_calculate_returns_results(client):
+    response = client.post('/api/calculate', json=HOUSEHOLD)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["monthly_units"] == 375.0
+    assert [a["monthly_kwh"] for a in data["appliances"]] == [270.0, 27.0, 60.0]
+
+
+def test_busy_server_returns_429(client, monkeypatch):
+    monkeypatch.setattr(wattswise, '_inflight', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(wattswise, 'QUEUE_TIMEOUT', 0)
+    wattswise._inflight.acquire()
+    try:
+        response = client.post('/api/calculate', json=HOUSEHOLD)
+    finally:
+        wattswise._inflight.release()
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == str(wattswise.RETRY_AFTER_SECONDS)
+    assert response.get_json()["error"]
+
+
+def test_slot_released_after_responses(client, monkeypatch):
+    monkeypatch.setattr(wattswise, '_inflight', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(wattswise, 'QUEUE_TIMEOUT', 0)
+    assert client.post('/api/calculate', json=HOUSEHOLD).status_code == 200
+    assert _slot_is_free()
+    bad = client.post('/api/calculate', data='{not json', content_type='application/json')
+    assert bad.status_code == 400
+    assert _slot_is_free()
+    assert client.get('/no-such-page').status_code == 404
+    assert _slot_is_free()
+    assert client.post('/api/calculate', json=HOUSEHOLD).status_code == 200
+
+
+def test_calculate_rejects_large_body(client, monkeypatch):
+    monkeypatch.setattr(wattswise, 'API_MAX_BYTES', 100)
+    response = client.post('/api/calculate', json=HOUSEHOLD)
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'Request body too large.'}
+
+
+
+def test_calculate_errors_are_json(client):
+    bad = client.post('/api/calculate', data='{not json', content_type='application/json')
+    assert bad.status_code == 400
+    assert bad.get_json() == {'error': 'Malformed request body.'}
+    wrong_type = client.post('/api/calculate', data='bill_amount=1')
+    assert wrong_type.status_code == 415
+    assert wrong_type.get_json() == {'error': 'Expected a JSON request body.'}
+
+def test_calculate_rejects_large_chunked_body(client, monkeypatch):
+    monkeypatch.setattr(wattswise, 'API_MAX_BYTES', 100)
+    body = b'{"bill_amount": 3000, "pad": "' + b'x' * 500 + b'"}'
+    response = client.post(
+        '/api/calculate',
+        input_stream=io.BytesIO(body),
+        headers={'Content-Type': 'application/json', 'Transfer-Encoding': 'chunked'},
+        environ_overrides={'CONTENT_LENGTH': '', 'wsgi.input_terminated': True},
+    )
+    assert response.status_code == 413
+
+
+def test_calculate_keeps_tip_for_unnamed_high_power_appliance(client):
+    payload = {"bill_amount": 800, "price_per_unit": 8, "appliances": [{"name": "", "watt": 2000, "hours": 1}]}
+    tips = client.post('/api/calculate', json=payload).get_json()["appliances"][0]["tips"]
+    assert tips == ["Consider replacing  with a more efficient model."]
+
+
+def _scenarios(client, scenarios, household=HOUSEHOLD):
+    return client.post('/api/scenarios', json=dict(household, scenarios=scenarios))
+
+
+def test_scenarios_noop_matches_base(client):
+    data = _scenarios(client, [{"name": "current"}]).get_json()
+    row = data["scenarios"][0]
+    assert data["base"]["monthly_bill"] == 3000
+    assert row["monthly_bill"] == 3000
+    assert row["grid_units"] == data["base"]["monthly_units"] == 375.0
+    assert row["kwh_saved"] == 0
+    assert row["changed_appliances"] == [] and row["removed_appliances"] == []
+
+
+def test_scenarios_update_add_remove(client):
+    rows = _scenarios(client, [
+        {"name": "BLDC fans", "update": [{"name": "ceiling fan", "watt": 28}]},
+        {"name": "extra TV", "add": [{"name": "Television", "watt": 120, "hours": 5}]},
+        {"name": "no AC", "remove": ["Air Conditioner"]}
+    ]).get_json()["scenarios"]
+    fans, tv, no_ac = rows
+    assert fans["changed_appliances"][0]["monthly_kwh"] == 10.1
+    assert fans["grid_units"] == 358.1
+    assert fans["money_saved"] == 135.2
+    assert tv["grid_units"] == 393.0
+    assert tv["kwh_saved"] == -18.0
+    assert no_ac["removed_appliances"] == ["Air Conditioner"]
+    assert no_ac["appliance_kwh"] == 87.0
+    assert no_ac["kwh_saved"] == 270.0
+
+
+def test_scenarios_solar_offsets_grid_and_clamps_at_zero(client):
+    small, large = _scenarios(client, [{"solar_kw": 1}, {"solar_kw": 3}]).get_json()["scenarios"]
+    assert small["solar_kwh"] == 135.0
+    assert small["grid_units"] == 240.0
+    assert small["monthly_bill"] == 1920.0
+    assert large["grid_units"] == 0.0
+    assert large["monthly_bill"] == 0.0
+    assert large["kwh_saved"] == 375.0
+
+
+def test_scenarios_max_count_fits_size_limit(client):
+    scenario = {"name": "5-star AC", "update": [{"name": "Air Conditioner", "watt": 1000}], "solar_kw": 3}
+    response = _scenarios(client, [scenario] * wattswise.MAX_SCENARIOS)
+    assert response.status_code == 200
+    assert len(response.get_json()["scenarios"]) == wattswise.MAX_SCENARIOS
+    assert _scenarios(client, [scenario] * (wattswise.MAX_SCENARIOS + 1)).status_code == 400
+
+
+def test_scenarios_rejects_malformed_payloads(client):
+    for scenarios in (None, {"a": 1}, ["x"]):
+        response = _scenarios(client, scenarios)
+        assert response.status_code == 400
+        assert response.get_json()["error"]
+    for scenario in (
+        {"remove": [1]},
+        {"remove": "Geyser"},
+        {"update": [{"name": 5}]},
+        {"update": [{"watt": 10}]},
+        {"update": [{"name": "ceiling fann", "watt": 28}]},
+        {"remove": ["Dishwasher"]},
+        {"add": ["Television"]},
+        {"add": [{"name": "Television", "watt": "lots"}]},
+        {"add": [{"name": 5, "watt": 10, "hours": 1}]},
+        {"add": [{"name": ["x"]}]},
+        {"add": [{"watt": 10, "hours": 1}]},
+        {"update": [{"name": "Ceiling Fan", "watt": float("inf")}]},
+        {"solar_kw": float("nan")},
+        {"solar_kw": -5},
+        {"solar_kw": "3"},
+    ):
+        response = _scenarios(client, [scenario])
+        assert response.status_code == 400, scenario
+        assert response.get_json()["error"].startswith("Scenario 1:")
+
+
+
+def test_scenarios_ignores_new_name(client):
+    row = _scenarios(client, [{"update": [{"name": "Ceiling Fan", "new_name": 7, "watt": 28}]}]).get_json()["scenarios"][0]
+    assert row["changed_appliances"][0]["name"] == "Ceiling Fan"
+
+
+def test_scenarios_rejects_malformed_household(client):
+    assert client.post('/api/scenarios', json=[HOUSEHOLD]).status_code == 400
+    for household in (
+        dict(HOUSEHOLD, appliances="x"),
+        dict(HOUSEHOLD, appliances=["Geyser"]),
+        dict(HOUSEHOLD, appliances=[{"name": "Geyser", "watt": "abc", "hours": 1}]),
+        dict(HOUSEHOLD, appliances=[{"name": 5, "watt": 10, "hours": 1}]),
+        dict(HOUSEHOLD, bill_amount="x"),
+        dict(HOUSEHOLD, price_per_unit=float("nan")),
+    ):
+        response = _scenarios(client, [], household)
+        assert response.status_code == 400, household
+        assert response.get_json()["error"]